@@ -0,0 +1,88 @@
+"""Labeled corpus check and throughput microbenchmark for MessageClassifier.
+
+Usage: python bench_classifier.py [iterations]
+Exits non-zero if any corpus message is mislabeled.
+"""
+import sys
+import time
+
+from message_classifier import MessageClassifier, MessageIntent
+
+# (message, expected label, expected name)
+LABELED_CORPUS = [
+    ("My name is John", MessageIntent.NAME, "John"),
+    ("my name is adaeze and I need help", MessageIntent.NAME, "Adaeze"),
+    ("Call me Tunde", MessageIntent.NAME, "Tunde"),
+    ("name: Bisi", MessageIntent.NAME, "Bisi"),
+    ("I'm Chinedu", MessageIntent.NAME, "Chinedu"),
+    ("hi, it's Funmi", MessageIntent.NAME, "Funmi"),
+    ("This is Kemi.", MessageIntent.NAME, "Kemi"),
+    ("Emeka", MessageIntent.NAME, "Emeka"),
+    ("Ngozi Okafor", MessageIntent.NAME, "Ngozi Okafor"),
+    ("Hello", MessageIntent.GREETING, None),
+    ("hi there", MessageIntent.GREETING, None),
+    ("Good morning!", MessageIntent.GREETING, None),
+    ("hey", MessageIntent.GREETING, None),
+    ("Thanks", MessageIntent.THANKS, None),
+    ("thank you so much!", MessageIntent.THANKS, None),
+    ("ok thanks", MessageIntent.THANKS, None),
+    ("Much appreciated", MessageIntent.THANKS, None),
+    ("thanks for your help", MessageIntent.THANKS, None),
+    ("I am unable to verify my account", MessageIntent.FAQ_QUESTION, None),
+    ("I'm having trouble with my payment", MessageIntent.FAQ_QUESTION, None),
+    ("How long is a Tinted Glass Permit valid?", MessageIntent.FAQ_QUESTION, None),
+    ("hi, I didn't get the OTP", MessageIntent.FAQ_QUESTION, None),
+    ("thanks but how do I get a refund", MessageIntent.FAQ_QUESTION, None),
+    ("My invoice payment didn't reflect", MessageIntent.FAQ_QUESTION, None),
+    ("Help me", MessageIntent.FAQ_QUESTION, None),
+    ("this is urgent?", MessageIntent.FAQ_QUESTION, None),
+    ("Character certificate from diaspora", MessageIntent.FAQ_QUESTION, None),
+    ("this is wrong", MessageIntent.FAQ_QUESTION, None),
+    ("My name isaac", MessageIntent.FAQ_QUESTION, None),
+    ("call mead", MessageIntent.OTHER, None),
+    ("it's broken", MessageIntent.OTHER, None),
+    ("I'm stuck", MessageIntent.OTHER, None),
+    ("Hi, I'm confused", MessageIntent.OTHER, None),
+    ("Hey I can't log in", MessageIntent.OTHER, None),
+    ("Hello, the site keeps loading forever", MessageIntent.OTHER, None),
+    ("good morning, i have been waiting for 3 weeks", MessageIntent.FAQ_QUESTION, None),
+    ("thanks, but it still does not work", MessageIntent.FAQ_QUESTION, None),
+    ("OTP", MessageIntent.FAQ_QUESTION, None),
+    ("please call me tomorrow", MessageIntent.OTHER, None),
+    ("Hi, call me Tunde", MessageIntent.NAME, "Tunde"),
+    ("okay", MessageIntent.OTHER, None),
+    ("lol", MessageIntent.OTHER, None),
+    ("nice one", MessageIntent.OTHER, None),
+    ("👍", MessageIntent.OTHER, None),
+]
+
+
+def check_corpus(classifier: MessageClassifier) -> int:
+    failures = 0
+    for message, label, name in LABELED_CORPUS:
+        result = classifier.classify(message)
+        if result.label != label or result.name != name:
+            failures += 1
+            print(f"❌ {message!r}: expected ({label}, {name}), got ({result.label}, {result.name})")
+    print(f"✅ {len(LABELED_CORPUS) - failures}/{len(LABELED_CORPUS)} corpus messages labeled correctly")
+    return failures
+
+
+def benchmark(classifier: MessageClassifier, iterations: int) -> None:
+    messages = [message for message, _, _ in LABELED_CORPUS]
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for message in messages:
+            classifier.classify(message)
+    elapsed = time.perf_counter() - start
+    total = iterations * len(messages)
+    print(f"⏱️ {total} classifications in {elapsed:.3f}s "
+          f"({total / elapsed:,.0f} msg/s, {elapsed / total * 1e6:.2f} µs/msg)")
+
+
+if __name__ == "__main__":
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    classifier = MessageClassifier()
+    failures = check_corpus(classifier)
+    benchmark(classifier, iterations)
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,289 @@
+"""Shared embedding sidecar for multi-worker deployments.
+
+One process owns the SentenceTransformer model and serves encode requests
+over a Unix socket, batching texts from every worker into a single forward
+pass. On startup it also publishes the FAQ vectors to a read-only .npy file,
+located through a small JSON manifest, that workers memory-map instead of
+embedding the knowledge base themselves. It watches knowledge_base.py and
+republishes the vectors when it changes, so workers that reload the
+knowledge base find matching vectors again.
+
+Run alongside the app:
+    python embedding_service.py
+and start the workers with EMBEDDING_SERVICE_SOCKET set to the same path.
+"""
+import hashlib
+import importlib
+import json
+import logging
+import os
+import queue
+import socket
+import socketserver
+import struct
+import threading
+import time
+from typing import List
+
+import numpy as np
+
+import knowledge_base
+from knowledge_base import build_faq_documents
+from structured_logging import LOGGER_NAME, configure_logging
+
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+EMBEDDING_SERVICE_SOCKET = os.getenv("EMBEDDING_SERVICE_SOCKET", "/tmp/possap-embeddings.sock")
+EMBEDDING_MANIFEST_PATH = os.getenv("EMBEDDING_MANIFEST_PATH", "/tmp/possap-faq-vectors.json")
+# Seconds a worker waits for an encode before falling back to ChromaDB
+EMBEDDING_SERVICE_TIMEOUT = float(os.getenv("EMBEDDING_SERVICE_TIMEOUT", "2"))
+# Same setting as the app, so the sidecar picks up knowledge base edits too
+KB_RELOAD_INTERVAL_SECONDS = float(os.getenv("KB_RELOAD_INTERVAL_SECONDS", "30"))
+
+_HEADER = struct.Struct("!I")
+
+logger = logging.getLogger(LOGGER_NAME)
+
+
+def _send_frame(sock: socket.socket, payload: bytes):
+    sock.sendall(_HEADER.pack(len(payload)) + payload)
+
+
+def _recv_exact(sock: socket.socket, size: int) -> bytes:
+    chunks = []
+    while size:
+        chunk = sock.recv(size)
+        if not chunk:
+            raise ConnectionError("Embedding service connection closed")
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
+
+
+def _recv_frame(sock: socket.socket) -> bytes:
+    (size,) = _HEADER.unpack(_recv_exact(sock, _HEADER.size))
+    return _recv_exact(sock, size)
+
+
+def faq_fingerprint(documents: List[str], model_name: str) -> str:
+    """Identify a set of FAQ vectors by the documents and model that produced them"""
+    digest = hashlib.sha256(model_name.encode())
+    for document in documents:
+        digest.update(b"\0" + document.encode())
+    return digest.hexdigest()
+
+
+def publish_faq_vectors(vectors: np.ndarray, fingerprint: str, manifest_path: str = EMBEDDING_MANIFEST_PATH):
+    """Write FAQ vectors to a read-only .npy file and atomically point the manifest at it"""
+    vectors_path = f"{os.path.splitext(manifest_path)[0]}-{fingerprint[:16]}.npy"
+    tmp_path = f"{vectors_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as vectors_file:
+        np.save(vectors_file, np.ascontiguousarray(vectors, dtype=np.float32))
+    os.chmod(tmp_path, 0o444)
+    os.replace(tmp_path, vectors_path)
+
+    manifest = {"fingerprint": fingerprint, "path": vectors_path, "shape": list(vectors.shape)}
+    with open(f"{manifest_path}.{os.getpid()}.tmp", "w") as manifest_file:
+        json.dump(manifest, manifest_file)
+    os.replace(f"{manifest_path}.{os.getpid()}.tmp", manifest_path)
+
+
+def load_faq_vectors(documents: List[str], model_name: str = EMBEDDING_MODEL,
+                     manifest_path: str = EMBEDDING_MANIFEST_PATH) -> np.ndarray:
+    """Map the published FAQ vectors read-only, checking they match documents"""
+    with open(manifest_path) as manifest_file:
+        manifest = json.load(manifest_file)
+    if manifest["fingerprint"] != faq_fingerprint(documents, model_name):
+        raise ValueError(f"FAQ vectors published at {manifest_path} do not match the knowledge base")
+    return np.load(manifest["path"], mmap_mode="r")
+
+
+class _PendingEncode:
+    def __init__(self, texts: List[str]):
+        self.texts = texts
+        self.done = threading.Event()
+        self.vectors = None
+        self.error = None
+
+
+class EmbeddingBatcher:
+    """Coalesce concurrent encode requests into batched model calls"""
+
+    def __init__(self, model, max_batch_size: int = 64, max_wait_ms: float = 5.0):
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.queue = queue.Queue()
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        pending = _PendingEncode(texts)
+        self.queue.put(pending)
+        pending.done.wait()
+        if pending.error is not None:
+            raise pending.error
+        return pending.vectors
+
+    def _run(self):
+        while True:
+            batch = [self.queue.get()]
+            count = len(batch[0].texts)
+            deadline = time.monotonic() + self.max_wait
+            while count < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    pending = self.queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                batch.append(pending)
+                count += len(pending.texts)
+
+            texts = [text for pending in batch for text in pending.texts]
+            try:
+                vectors = self.model.encode(
+                    texts,
+                    batch_size=len(texts),
+                    convert_to_numpy=True,
+                    normalize_embeddings=True
+                ).astype(np.float32)
+                offset = 0
+                for pending in batch:
+                    pending.vectors = vectors[offset:offset + len(pending.texts)]
+                    offset += len(pending.texts)
+            except Exception as e:
+                logger.exception("embedding_batch_failed")
+                for pending in batch:
+                    pending.error = e
+            finally:
+                for pending in batch:
+                    pending.done.set()
+            logger.debug("embedding_batch_encoded", extra={"fields": {"requests": len(batch), "texts": len(texts)}})
+
+
+class _EncodeHandler(socketserver.BaseRequestHandler):
+    """Serve length-prefixed JSON encode requests on one persistent connection"""
+
+    def handle(self):
+        while True:
+            try:
+                request = json.loads(_recv_frame(self.request))
+            except ConnectionError:
+                return
+            try:
+                vectors = self.server.batcher.encode(request["texts"])
+                header = {"shape": list(vectors.shape)}
+                payload = vectors.tobytes()
+            except Exception as e:
+                header = {"error": str(e)}
+                payload = b""
+            _send_frame(self.request, json.dumps(header).encode())
+            self.request.sendall(payload)
+
+
+class EmbeddingServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path: str, batcher: EmbeddingBatcher):
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        self.batcher = batcher
+        super().__init__(socket_path, _EncodeHandler)
+        os.chmod(socket_path, 0o660)
+
+
+class EmbeddingClient:
+    """Worker-side client; keeps one connection per thread to the sidecar"""
+
+    def __init__(self, socket_path: str = EMBEDDING_SERVICE_SOCKET, timeout: float = EMBEDDING_SERVICE_TIMEOUT):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self.local = threading.local()
+
+    def _connection(self) -> socket.socket:
+        sock = getattr(self.local, "sock", None)
+        if sock is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                sock.settimeout(self.timeout)
+                sock.connect(self.socket_path)
+            except OSError:
+                sock.close()
+                raise
+            self.local.sock = sock
+        return sock
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """Embed texts into L2-normalised float32 vectors"""
+        for attempt in range(2):
+            try:
+                sock = self._connection()
+                _send_frame(sock, json.dumps({"texts": list(texts)}).encode())
+                header = json.loads(_recv_frame(sock))
+                if "error" in header:
+                    raise RuntimeError(f"Embedding service error: {header['error']}")
+                rows, dims = header["shape"]
+                payload = _recv_exact(sock, rows * dims * 4)
+                return np.frombuffer(payload, dtype=np.float32).reshape(rows, dims)
+            except OSError as e:
+                sock = getattr(self.local, "sock", None)
+                if sock is not None:
+                    sock.close()
+                    self.local.sock = None
+                # The sidecar may have restarted, so reconnect once; a timeout
+                # means it is hung, and waiting again would only double the delay
+                if attempt or isinstance(e, socket.timeout):
+                    raise
+
+
+def publish_knowledge_base(batcher: EmbeddingBatcher, faqs: List[dict]):
+    """Embed the FAQs and publish their vectors for the workers"""
+    documents = build_faq_documents(faqs)["documents"]
+    publish_faq_vectors(batcher.encode(documents), faq_fingerprint(documents, EMBEDDING_MODEL))
+    logger.info("faq_vectors_published", extra={"fields": {"path": EMBEDDING_MANIFEST_PATH, "faq_count": len(documents)}})
+
+
+def watch_knowledge_base(batcher: EmbeddingBatcher, interval_seconds: float):
+    """Poll knowledge_base.py in the background and republish the vectors when edited"""
+    def watch():
+        last_mtime = os.stat(knowledge_base.__file__).st_mtime_ns
+        faqs = knowledge_base.possap_faqs
+        while True:
+            time.sleep(interval_seconds)
+            try:
+                mtime = os.stat(knowledge_base.__file__).st_mtime_ns
+                if mtime != last_mtime:
+                    last_mtime = mtime
+                    reloaded = importlib.reload(knowledge_base).possap_faqs
+                    if reloaded != faqs:
+                        faqs = reloaded
+                        publish_knowledge_base(batcher, faqs)
+            except Exception:
+                logger.exception("knowledge_base_republish_failed")
+
+    threading.Thread(target=watch, daemon=True).start()
+
+
+def main():
+    from sentence_transformers import SentenceTransformer
+
+    configure_logging()
+
+    model = SentenceTransformer(EMBEDDING_MODEL)
+    batcher = EmbeddingBatcher(
+        model,
+        max_batch_size=int(os.getenv("EMBEDDING_MAX_BATCH_SIZE", "64")),
+        max_wait_ms=float(os.getenv("EMBEDDING_MAX_WAIT_MS", "5"))
+    )
+
+    publish_knowledge_base(batcher, knowledge_base.possap_faqs)
+    if KB_RELOAD_INTERVAL_SECONDS > 0:
+        watch_knowledge_base(batcher, KB_RELOAD_INTERVAL_SECONDS)
+
+    with EmbeddingServer(EMBEDDING_SERVICE_SOCKET, batcher) as server:
+        logger.info("embedding_service_started", extra={"fields": {"socket": EMBEDDING_SERVICE_SOCKET, "model": EMBEDDING_MODEL}})
+        server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,320 @@
+"""Offline retrieval evaluation for the POSSAP FAQ knowledge base.
+
+Runs a labeled paraphrase query set through FAQRetriever.retrieve_relevant_faqs,
+the same code the app serves with, for every retrieval backend and embedding
+model, and writes recall@1/3/5, MRR, per-query latency and memory use to a
+JSON report that can be diffed across runs.
+
+Backends:
+    chroma             in-process ChromaDB collection (the default app path)
+    embedding_service  cosine search over published, memory-mapped FAQ vectors
+                       (the sidecar path); queries are encoded in-process
+                       instead of over the socket
+
+Each backend/model pair runs in its own subprocess so memory numbers are
+not inflated by models loaded for earlier pairs.
+
+Usage: python eval_retrieval.py [--models default all-MiniLM-L6-v2 ...]
+                                [--backends chroma embedding_service] [--output report.json]
+
+The "default" model is ChromaDB's built-in embedding function, which is
+what the app uses when no embedding service is configured.
+"""
+import argparse
+import atexit
+import json
+import logging
+import os
+import platform
+import resource
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from typing import Dict, List
+
+import numpy as np
+
+from knowledge_base import possap_faqs, build_faq_documents
+from structured_logging import LOGGER_NAME
+
+# (paraphrased user query, substring identifying the expected FAQ question)
+EVAL_QUERIES = [
+    ("signing up with my NIN says something went wrong contact admin", "something went wrong"),
+    ("BVN registration error asking me to contact POSSAP admin", "something went wrong"),
+    ("my name order on the portal doesn't match my passport", "name arrangement"),
+    ("surname and first name are swapped compared to my passport", "name arrangement"),
+    ("how do I update the old phone number showing on my profile", "my old one"),
+    ("the email on POSSAP is outdated, can I change it", "my old one"),
+    ("I keep getting verification codes but my account won't verify", "multiple verification codes"),
+    ("account verification fails even with the codes sent to me", "multiple verification codes"),
+    ("I never got the OTP to verify my account", "did not receive the OTP"),
+    ("no one-time password in my email", "did not receive the OTP"),
+    ("registration says user already exists", "User already exists"),
+    ("it tells me an account already exists for my details", "User already exists"),
+    ("I was debited for VVS but my invoice still shows unpaid", "payment for VVS"),
+    ("vehicle verification payment not showing on invoice", "payment for VVS"),
+    ("what medical document do I need for a tinted glass permit on health grounds", "health-related"),
+    ("proof for tinted windows because of a medical condition", "health-related"),
+    ("documents to upload for virtual verification of tinted glass", "opting for the Virtual verification"),
+    ("what do I submit for tinted permit virtual vehicle verification", "opting for the Virtual verification"),
+    ("how long does the tinted glass permit last", "How long is a Tinted Glass Permit valid"),
+    ("when does my tint permit expire", "How long is a Tinted Glass Permit valid"),
+    ("who can use the virtual vehicle verification system", "Who is eligible"),
+    ("is my car eligible for virtual verification of tinted glass", "Who is eligible"),
+    ("why does the site send me somewhere else to verify my vehicle", "redirected to another site"),
+    ("what is the vehicle verification system VVS", "redirected to another site"),
+    ("I live abroad, what proof of residence should I upload", "applying from the diaspora"),
+    ("documents to show I'm outside Nigeria for character certificate", "applying from the diaspora"),
+    ("is biometric capture free for police character certificate", "biometric capturing cost"),
+    ("do I pay for fingerprint capture and inspection", "biometric capturing cost"),
+    ("face capture keeps failing on the portal", "isn't capturing my face"),
+    ("camera won't detect my face during verification", "isn't capturing my face"),
+    ("face does not match error during virtual verification", "Face does not match"),
+    ("verification says my face doesn't match my photo", "Face does not match"),
+    ("can I pay for diaspora application with naira", "diaspora application in Naira"),
+    ("what currency do I use to pay as a diaspora applicant", "diaspora application in Naira"),
+    ("I paid twice for the same invoice, how do I get my money back", "double payment"),
+    ("refund for duplicate payment", "double payment"),
+    ("I paid into the wrong invoice number, can it be moved", "wrong invoice number"),
+    ("move my payment to the correct invoice", "wrong invoice number"),
+    ("can a payment under a wrong invoice be transferred to another service", "Can I transfer a payment"),
+    ("I paid for my invoice but it's not showing as paid", "generated invoice, but it didn't reflect"),
+    ("payment on invoice not reflecting", "generated invoice, but it didn't reflect"),
+    ("I paid in naira instead of dollars and it didn't reflect", "mistakenly paid in naira"),
+    ("wrong currency payment of 53.76 USD in naira", "mistakenly paid in naira"),
+    ("my application has been pending for weeks", "pending for over 2 weeks"),
+    ("how do I get my stuck application approved", "pending for over 2 weeks"),
+]
+
+K_VALUES = (1, 3, 5)
+
+
+def resolve_expected_indices() -> List[int]:
+    """Map each query's expected-question substring to a unique FAQ index"""
+    indices = []
+    for query, expected in EVAL_QUERIES:
+        matches = [i for i, faq in enumerate(possap_faqs) if expected in faq['question']]
+        if len(matches) != 1:
+            raise ValueError(f"Expected FAQ {expected!r} for {query!r} matched {len(matches)} FAQs")
+        indices.append(matches[0])
+    return indices
+
+
+def current_rss_mb() -> float:
+    """Resident set size of this process in MB"""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        return peak_rss_mb()
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process in MB"""
+    # Kilobytes on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2**20 if platform.system() == "Darwin" else peak / 2**10
+
+
+class RetrievalIssueRecorder(logging.Handler):
+    """Collect warnings and errors FAQRetriever logs, which it otherwise swallows"""
+
+    def __init__(self):
+        super().__init__(logging.WARNING)
+        self.events = []
+
+    def emit(self, record: logging.LogRecord):
+        self.events.append(record.getMessage())
+
+
+class LocalEncoder:
+    """In-process stand-in for EmbeddingClient with the same encode() contract"""
+
+    def __init__(self, model: str):
+        if model == "default":
+            from chromadb.utils.embedding_functions import DefaultEmbeddingFunction
+            embedding_function = DefaultEmbeddingFunction()
+            self._encode = lambda texts: np.asarray(embedding_function(texts), dtype=np.float32)
+        else:
+            from sentence_transformers import SentenceTransformer
+            sentence_model = SentenceTransformer(model)
+            self._encode = lambda texts: sentence_model.encode(texts, convert_to_numpy=True).astype(np.float32)
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        vectors = self._encode(list(texts))
+        return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def build_retriever(backend_name: str, model: str):
+    """Construct FAQRetriever configured the way the app would run it"""
+    from faq_retrieval import FAQRetriever
+
+    if backend_name == "chroma":
+        embedding_function = None
+        if model != "default":
+            from chromadb.utils.embedding_functions import SentenceTransformerEmbeddingFunction
+            embedding_function = SentenceTransformerEmbeddingFunction(model_name=model)
+        retriever = FAQRetriever(
+            embedding_function=embedding_function,
+            collection_name=f"possap_eval_{uuid.uuid4().hex}"
+        )
+        if retriever.collection is None:
+            raise RuntimeError("FAQRetriever failed to build the ChromaDB collection")
+        return retriever
+
+    if backend_name == "embedding_service":
+        from embedding_service import faq_fingerprint, publish_faq_vectors
+
+        encoder = LocalEncoder(model)
+        documents = build_faq_documents(possap_faqs)["documents"]
+        manifest_dir = tempfile.mkdtemp(prefix="possap-eval-")
+        atexit.register(shutil.rmtree, manifest_dir, ignore_errors=True)
+        manifest_path = os.path.join(manifest_dir, "faq-vectors.json")
+        publish_faq_vectors(encoder.encode(documents), faq_fingerprint(documents, model), manifest_path)
+        retriever = FAQRetriever(embedding_client=encoder, embedding_model=model, manifest_path=manifest_path)
+        if retriever.faq_vectors is None:
+            raise RuntimeError("FAQRetriever did not load the published FAQ vectors")
+        return retriever
+
+    raise ValueError(f"Unknown backend {backend_name!r}")
+
+
+BACKENDS = ["chroma", "embedding_service"]
+# FAQRetriever.retrieval_backend each backend must report for every query
+EXPECTED_RETRIEVAL_BACKENDS = {"chroma": "chromadb", "embedding_service": "embedding_service"}
+
+
+def evaluate(backend_name: str, model: str) -> Dict:
+    """Build one backend/model pair and score it on the query set"""
+    expected_indices = resolve_expected_indices()
+    faq_index = {faq['question']: i for i, faq in enumerate(possap_faqs)}
+
+    rss_before = current_rss_mb()
+    build_start = time.perf_counter()
+    retriever = build_retriever(backend_name, model)
+    build_seconds = time.perf_counter() - build_start
+    rss_after_build = current_rss_mb()
+
+    # Failures and fallbacks would otherwise show up as low recall or as
+    # another backend's numbers, so any of them fails the pair
+    recorder = RetrievalIssueRecorder()
+    logging.getLogger(LOGGER_NAME).addHandler(recorder)
+
+    n_results = max(K_VALUES)
+    per_query = []
+    for (query, _), expected in zip(EVAL_QUERIES, expected_indices):
+        start = time.perf_counter()
+        retrieved = retriever.retrieve_relevant_faqs(query, n_results=n_results)
+        latency_ms = (time.perf_counter() - start) * 1000
+        if recorder.events:
+            raise RuntimeError(f"Retrieval for {query!r} logged {', '.join(recorder.events)}")
+        if retriever.retrieval_backend != EXPECTED_RETRIEVAL_BACKENDS[backend_name]:
+            raise RuntimeError(f"Retrieval for {query!r} was served by {retriever.retrieval_backend}")
+        retrieved_indices = [faq_index[faq['question']] for faq in retrieved]
+        rank = retrieved_indices.index(expected) + 1 if expected in retrieved_indices else None
+        per_query.append({
+            "query": query,
+            "expected_question": possap_faqs[expected]['question'],
+            "rank": rank,
+            "latency_ms": round(latency_ms, 3)
+        })
+
+    ranks = [entry["rank"] for entry in per_query]
+    latencies = sorted(entry["latency_ms"] for entry in per_query)
+    metrics = {
+        f"recall@{k}": round(sum(1 for rank in ranks if rank and rank <= k) / len(ranks), 4)
+        for k in K_VALUES
+    }
+    metrics["mrr"] = round(sum(1 / rank for rank in ranks if rank) / len(ranks), 4)
+
+    return {
+        "backend": backend_name,
+        "model": model,
+        "metrics": metrics,
+        "latency_ms": {
+            "mean": round(statistics.mean(latencies), 3),
+            "p50": round(latencies[len(latencies) // 2], 3),
+            "p95": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 3),
+            "max": round(latencies[-1], 3)
+        },
+        "build_seconds": round(build_seconds, 3),
+        "memory_mb": {
+            # Headline number: memory the backend and model added
+            "build_delta": round(rss_after_build - rss_before, 1),
+            "rss_after_queries": round(current_rss_mb(), 1),
+            "peak_rss": round(peak_rss_mb(), 1)
+        },
+        "per_query": per_query
+    }
+
+
+def evaluate_in_subprocess(backend_name: str, model: str) -> Dict:
+    """Run evaluate() in a fresh interpreter so pairs don't share memory"""
+    with tempfile.NamedTemporaryFile(suffix=".json", delete=False) as result_file:
+        result_path = result_file.name
+    try:
+        completed = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--single", backend_name, model, "--output", result_path],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            stderr=subprocess.PIPE,
+            text=True
+        )
+        if completed.returncode != 0:
+            error_lines = completed.stderr.strip().splitlines() or [f"exit code {completed.returncode}"]
+            raise RuntimeError(error_lines[-1])
+        with open(result_path) as result_file:
+            return json.load(result_file)
+    finally:
+        os.unlink(result_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--models", nargs="+", default=["default", "all-MiniLM-L6-v2"])
+    parser.add_argument("--backends", nargs="+", default=BACKENDS, choices=BACKENDS)
+    parser.add_argument("--output", default="retrieval_eval_report.json")
+    parser.add_argument("--single", nargs=2, metavar=("BACKEND", "MODEL"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.single:
+        # Child mode: evaluate one pair and write its result
+        with open(args.output, "w") as result_file:
+            json.dump(evaluate(*args.single), result_file)
+        return
+
+    # Fail fast on a mislabeled query set before spawning anything
+    resolve_expected_indices()
+
+    results = []
+    for backend_name in args.backends:
+        for model in args.models:
+            try:
+                result = evaluate_in_subprocess(backend_name, model)
+            except Exception as e:
+                print(f"❌ {backend_name}/{model} failed: {e}")
+                results.append({"backend": backend_name, "model": model, "error": str(e)})
+                continue
+            results.append(result)
+            metrics = result["metrics"]
+            print(f"✅ {backend_name}/{model}: R@1={metrics['recall@1']} R@3={metrics['recall@3']} "
+                  f"R@5={metrics['recall@5']} MRR={metrics['mrr']} p50={result['latency_ms']['p50']}ms "
+                  f"mem+={result['memory_mb']['build_delta']}MB")
+
+    report = {
+        "generated_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(),
+        "faq_count": len(possap_faqs),
+        "query_count": len(EVAL_QUERIES),
+        "results": results
+    }
+    with open(args.output, "w") as report_file:
+        json.dump(report, report_file, indent=2)
+    print(f"📄 Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
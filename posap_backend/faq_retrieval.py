@@ -0,0 +1,231 @@
+import importlib
+import logging
+import os
+import time
+import uuid
+from threading import Lock, Thread
+from typing import Callable, List, Dict
+
+import chromadb
+import numpy as np
+
+import knowledge_base
+from knowledge_base import build_faq_documents
+from embedding_service import EMBEDDING_MODEL, EMBEDDING_MANIFEST_PATH, load_faq_vectors
+from structured_logging import LOGGER_NAME, log_duration
+
+logger = logging.getLogger(LOGGER_NAME)
+
+
+class FAQRetriever:
+    """Retrieval half of the RAG system, free of Flask and LLM dependencies.
+    
+    Searches the knowledge base either through an in-process ChromaDB
+    collection or, when an embedding client is given, by exact cosine
+    search over the FAQ vectors published by the embedding service.
+    The offline eval harness drives this class directly.
+    """
+    
+    # Seconds between attempts to map the sidecar's vectors while they are missing
+    VECTOR_RETRY_INTERVAL = 5.0
+    # Seconds to serve from ChromaDB after an encode fails, before trying the sidecar again
+    ENCODE_FAILURE_COOLDOWN = 30.0
+    
+    def __init__(self, embedding_client=None, embedding_function: Callable = None,
+                 embedding_model: str = EMBEDDING_MODEL, manifest_path: str = EMBEDDING_MANIFEST_PATH,
+                 collection_name: str = "possap_faqs"):
+        self.collection_name = collection_name
+        # Initialize ChromaDB client as instance attribute
+        self.chroma_client = chromadb.Client()
+        # None uses ChromaDB's built-in embedding function
+        self.embedding_function = embedding_function
+        # Bumped on every successful (re)load so dependants can detect changes
+        self.kb_version = 0
+        self.reload_listeners = []
+        # With the sidecar, FAQ vectors are mapped from its published file
+        # and only queries are sent to it for encoding
+        self.embedding_client = embedding_client
+        self.embedding_model = embedding_model
+        self.manifest_path = manifest_path
+        self.faq_vectors = None
+        self.faq_metadatas = []
+        self.collection = None
+        self.last_vector_load_attempt = 0.0
+        self.vector_load_error = None
+        self.encode_retry_at = 0.0
+        # Guards swapping between the shared vectors and the ChromaDB collection
+        self.index_lock = Lock()
+        self.faqs = knowledge_base.possap_faqs
+        self.setup_vector_database()
+    
+    def add_reload_listener(self, callback):
+        """Register a callback invoked after the knowledge base is reloaded"""
+        self.reload_listeners.append(callback)
+    
+    def reload_knowledge_base(self) -> bool:
+        """Re-import knowledge_base.py and rebuild the index if the FAQs changed"""
+        faqs = importlib.reload(knowledge_base).possap_faqs
+        if faqs == self.faqs:
+            return False
+        self.faqs = faqs
+        self.setup_vector_database()
+        return True
+    
+    def watch_knowledge_base(self, interval_seconds: float):
+        """Poll knowledge_base.py in the background and reload it when edited"""
+        def watch():
+            last_mtime = os.stat(knowledge_base.__file__).st_mtime_ns
+            while True:
+                time.sleep(interval_seconds)
+                try:
+                    mtime = os.stat(knowledge_base.__file__).st_mtime_ns
+                    if mtime != last_mtime:
+                        last_mtime = mtime
+                        if self.reload_knowledge_base():
+                            logger.info("knowledge_base_reloaded", extra={"fields": {"faq_count": len(self.faqs)}})
+                except Exception:
+                    logger.exception("knowledge_base_reload_failed")
+        
+        Thread(target=watch, daemon=True).start()
+    
+    def setup_vector_database(self):
+        """Initialize ChromaDB collection with POSSAP FAQs"""
+        try:
+            with self.index_lock:
+                self.faq_vectors = None
+                self.faq_metadatas = []
+                self.last_vector_load_attempt = 0.0
+                self.drop_chroma_collection()
+                
+                if self.embedding_client is not None:
+                    # ChromaDB is only built later if the sidecar's vectors stay unavailable
+                    self.load_shared_vectors()
+                else:
+                    self.build_chroma_collection()
+            
+            self.kb_version += 1
+            logger.info("vector_database_initialized", extra={"fields": {
+                "faq_count": len(self.faqs),
+                "backend": self.retrieval_backend
+            }})
+            
+            for callback in self.reload_listeners:
+                callback()
+            
+        except Exception:
+            logger.exception("vector_database_setup_failed")
+    
+    @property
+    def retrieval_backend(self) -> str:
+        """Which index currently serves queries, for logs and /health"""
+        if self.faq_vectors is not None and time.monotonic() >= self.encode_retry_at:
+            return "embedding_service"
+        if self.embedding_client is not None:
+            return "chromadb_fallback"
+        return "chromadb"
+    
+    def load_shared_vectors(self) -> bool:
+        """Map the sidecar's published FAQ vectors; call with index_lock held"""
+        self.last_vector_load_attempt = time.monotonic()
+        faq_documents = build_faq_documents(self.faqs)
+        try:
+            self.faq_vectors = load_faq_vectors(faq_documents["documents"], self.embedding_model, self.manifest_path)
+        except (OSError, ValueError, KeyError) as e:
+            # Retried every few seconds, so only log when the reason changes
+            error = f"{type(e).__name__}: {e}"
+            if error != self.vector_load_error:
+                self.vector_load_error = error
+                logger.warning("faq_vectors_unavailable", extra={"fields": {"error": error}})
+            return False
+        self.vector_load_error = None
+        self.faq_metadatas = faq_documents["metadatas"]
+        logger.info("faq_vectors_mapped", extra={"fields": {"manifest": self.manifest_path}})
+        return True
+    
+    def build_chroma_collection(self):
+        """Build the in-process ChromaDB collection; call with index_lock held"""
+        faq_documents = build_faq_documents(self.faqs)
+        
+        # Create new collection
+        collection_options = {}
+        if self.embedding_function is not None:
+            collection_options["embedding_function"] = self.embedding_function
+        collection = self.chroma_client.create_collection(
+            name=self.collection_name,
+            metadata={"hnsw:space": "cosine"},
+            **collection_options
+        )
+        
+        # Add documents to collection
+        collection.add(
+            documents=faq_documents["documents"],
+            metadatas=faq_documents["metadatas"],
+            ids=[str(uuid.uuid4()) for _ in faq_documents["documents"]]
+        )
+        self.collection = collection
+    
+    def drop_chroma_collection(self):
+        """Delete the ChromaDB collection if it exists; call with index_lock held"""
+        self.collection = None
+        try:
+            self.chroma_client.delete_collection(name=self.collection_name)
+        except:
+            pass
+    
+    def chroma_collection(self):
+        """Return the ChromaDB collection, building it on first use"""
+        with self.index_lock:
+            if self.collection is None:
+                logger.warning("building_chromadb_fallback_collection")
+                self.build_chroma_collection()
+            return self.collection
+    
+    def retrieve_relevant_faqs(self, query: str, n_results: int = 3) -> List[Dict]:
+        """Retrieve most relevant FAQs based on user query"""
+        try:
+            start = time.perf_counter()
+            
+            # Keep retrying the sidecar's vectors, e.g. while it is still starting up
+            if (self.embedding_client is not None and self.faq_vectors is None
+                    and time.monotonic() - self.last_vector_load_attempt >= self.VECTOR_RETRY_INTERVAL):
+                with self.index_lock:
+                    if self.faq_vectors is None:
+                        self.load_shared_vectors()
+            
+            faq_vectors, faq_metadatas = self.faq_vectors, self.faq_metadatas
+            query_vector = None
+            if faq_vectors is not None and time.monotonic() >= self.encode_retry_at:
+                try:
+                    query_vector = self.embedding_client.encode([query])[0]
+                except (OSError, RuntimeError):
+                    # Skip the sidecar for a while so each request doesn't wait out its timeout
+                    self.encode_retry_at = time.monotonic() + self.ENCODE_FAILURE_COOLDOWN
+                    logger.warning("embedding_service_unavailable_using_chromadb", exc_info=True)
+            
+            if query_vector is not None:
+                # Exact cosine search over the shared, normalised FAQ vectors
+                scores = faq_vectors @ query_vector
+                top_indices = np.argsort(-scores)[:n_results]
+                matched_metadatas = [faq_metadatas[i] for i in top_indices]
+            else:
+                results = self.chroma_collection().query(
+                    query_texts=[query],
+                    n_results=n_results
+                )
+                matched_metadatas = results['metadatas'][0] if results['metadatas'] else []
+            
+            relevant_faqs = []
+            if matched_metadatas:
+                for metadata in matched_metadatas:
+                    relevant_faqs.append({
+                        "question": metadata['question'],
+                        "answer": metadata['answer'],
+                        "category": metadata['category']
+                    })
+            
+            log_duration(logger, "faqs_retrieved", start, n_results=n_results, hits=len(relevant_faqs))
+            return relevant_faqs
+            
+        except Exception:
+            logger.exception("faq_retrieval_failed")
+            return []
@@ -0,0 +1,146 @@
+from typing import List, Dict
+
+# POSSAP Knowledge Base - UPDATED FAQs from Revised Official Document
+possap_faqs = [
+    # Registration and Account Creation (Q1-Q4, Q22-Q23)
+    {
+        "question": 'I tried to use my NIN/BVN to sign up on the POSSAP portal and got an error saying "something went wrong, please contact POSSAP admin"',
+        "answer": 'This means your NIN or BVN record does not have a phone number linked to it. If using NIN, visit the nearest NIMC office to update your record with your current phone number. If using BVN, visit your bank to update your phone number in your BVN details. After updating, contact POSSAP to have your information revalidated in the system.',
+        "category": 'registration'
+    },
+    {
+        "question": 'The name arrangement I see on the POSSAP site is different from what appears on my passport',
+        "answer": 'POSSAP pulls your name directly from NIMC or your bank. Just visit your nearest NIMC office or your bank branch to update how your name appears on your BVN/NIN and contact POSSAP at info@possap.gov.ng for revalidation to proceed with your application.',
+        "category": 'registration'
+    },
+    {
+        "question": 'The phone number or email shown on the POSSAP site is my old one. How can I change it?',
+        "answer": 'POSSAP retrieves information such as your name, phone number etc. directly from the National Identify Management Commission NIMC or Nigeria Inter-bank Settlement System (NIBSS). If your name appears incorrectly, kindly visit the NIMC head office in your state of residence, or the nearest branch of your bank to update the details of your National identification Number (NIN) or your Bank verification Number (BVN) respectively, reach out to POSSAP with your NIN and updated information for revalidation, before continuing your registration.',
+        "category": 'registration'
+    },
+    {
+        "question": "I'm unable to verify my account even after receiving multiple verification codes",
+        "answer": 'Please contact POSSAP Customer Service with your NIN/BVN, phone number and email address via: Phone: 02018884040 and/or email: info@possap.gov.ng',
+        "category": 'registration'
+    },
+    {
+        "question": 'I did not receive the OTP for account verification. What should I do?',
+        "answer": 'Check your spam or junk folder. If not received, confirm your email address is correct and click Resend OTP.',
+        "category": 'registration'
+    },
+    {
+        "question": 'The system says "User already exists" during registration. What should I do?',
+        "answer": 'This means an account is already linked to that identifier or email. Use the Forgot Password option to regain access.',
+        "category": 'registration'
+    },
+    
+    # Tinted Glass Permit Related Issues (Q5-Q7, Q18-Q19, Q24)
+    {
+        "question": "I made payment for VVS and was debited, but it didn't reflect on my invoice",
+        "answer": 'Kindly contact POSSAP Customer Care with your invoice number, Vehicle Identification Number (VIN) and Proof of payment for assistance via the following contact information: Phone: 02018884040 and/or email: info@possap.gov.ng',
+        "category": 'tinted_glass'
+    },
+    {
+        "question": 'What document should I upload to support my Tinted Glass Permit (health-related) application?',
+        "answer": 'You are required to upload a medical report from a government recognized hospital which is duly signed and stamped by the hospital to support your health claim when submitting your application on the POSSAP portal.',
+        "category": 'tinted_glass'
+    },
+    {
+        "question": 'What documents do I need to upload as an applicant for the Tinted Glass Permit opting for the Virtual verification?',
+        "answer": 'Required Documents for uploading include: Proof of ownership of vehicle, Vehicle licensed data page, Supporting document for your reason for application (medical report for health reasons, ID Card for Security reasons, and document proving vehicle is factory fitted with tinted windows for Factory Fitted options).',
+        "category": 'tinted_glass'
+    },
+    {
+        "question": 'How long is a Tinted Glass Permit valid?',
+        "answer": 'The Tinted Glass Permit is valid for one year from the date of issuance and must be renewed after expiration.',
+        "category": 'tinted_glass'
+    },
+    {
+        "question": 'Who is eligible to apply for the Virtual Vehicle Verification System Tinted Glass Permit on the POSSAP platform?',
+        "answer": 'Only owners of vehicles with a valid 17-digit Vehicle Identification Number (VIN) that conforms to international standards are eligible for the Virtual Vehicle Verification System.',
+        "category": 'tinted_glass'
+    },
+    {
+        "question": 'Why am I redirected to another site for Vehicle Verification, what is the Vehicle verification System about?',
+        "answer": "The Vehicle Verification System (VVS) is an external platform integrated with POSSAP. It serves as a Global Vehicle Identification Number (VIN) database that POSSAP utilizes to securely and in real time retrieve comprehensive vehicle information from the global database, thereby ensuring accurate capture of applicants' vehicle details.",
+        "category": 'tinted_glass'
+    },
+    
+    # Police Character Certificate (Q8, Q17)
+    {
+        "question": "I am applying from the diaspora. What proof should I upload to show I'm not in Nigeria?",
+        "answer": 'You can upload any valid supporting document, such as: Official Diaspora Proof of residence document, Utility bills (water or electricity), Bank statement, Lease agreement or other proof of residence abroad, Drivers license, Work permit.',
+        "category": 'character_certificate'
+    },
+    {
+        "question": 'How much does biometric capturing cost for Police Character Certificate & Tinted Glass Permit?',
+        "answer": 'Biometric capturing and physical inspection sessions required for the issuance of Police Character Certificates and Tinted Glass Permits are completely free of charge. Applicants are not required to make any payments for these processes.',
+        "category": 'character_certificate'
+    },
+    
+    # Facial Verification Issues (Q9, Q21)
+    {
+        "question": "The facial verification process isn't capturing my face after several attempts",
+        "answer": 'Try the following: Use a Computer (Desktop/Laptop) instead of a mobile device, Ensure adequate lighting in the room of capture, Use your most recent passport photo for upload. If the issue persists, contact POSSAP Customer Service: Phone: 02018884040 and/or email: info@possap.gov.ng',
+        "category": 'verification'
+    },
+    {
+        "question": 'Why am I unable to complete the virtual verification, and why do I keep getting an error that says, "Face does not match"?',
+        "answer": 'This issue may be due to the use of an outdated passport photograph during your application. Kindly contact the POSSAP Support Team via Phone: 02018884040 or Email: info@possap.gov.ng to request that your uploaded photograph be updated with a more recent one.',
+        "category": 'verification'
+    },
+    
+    # Payment-Related Issues (Q10-Q13, Q16, Q25)
+    {
+        "question": 'Can I make payment for a diaspora application in Naira?',
+        "answer": 'Diaspora payments must be made in dollars (or the corresponding currency of your host country), and for the exact amount displayed on the POSSAP portal.',
+        "category": 'payment'
+    },
+    {
+        "question": 'I erroneously made double payment on the same invoice. How do I get a refund?',
+        "answer": 'Email POSSAP Customer Service at info@possap.gov.ng or call 02018884040, providing the following: Receipt of both payments, Date of payment, Invoice number, Account number paid into, Your Bank details (Account name & Number), Your email address and phone number. Refund processing will follow once verification processes have been concluded.',
+        "category": 'payment'
+    },
+    {
+        "question": 'I made payment on the wrong invoice number. Can I transfer the payment to the correct one?',
+        "answer": 'Payments cannot be transferred between invoices. You may either use the service linked to the paid invoice or make a new payment under the correct invoice.',
+        "category": 'payment'
+    },
+    {
+        "question": 'Can I transfer a payment made under the wrong invoice?',
+        "answer": 'No. Kindly note that Payments are linked to specific invoices and cannot be transferred. You will be required to initiate a new payment for the appropriate service.',
+        "category": 'payment'
+    },
+    {
+        "question": "I made payment on my generated invoice, but it didn't reflect",
+        "answer": "Contact POSSAP Customer Service with your payment receipt and invoice number: Phone: 02018884040 and/or email: info@possap.gov.ng. If payment hasn't reflected on POSSAP's end, you will be advised to contact your bank to lodge a complaint.",
+        "category": 'payment'
+    },
+    {
+        "question": 'Why is my payment not reflected after I mistakenly paid in naira instead of 53.76 USD?',
+        "answer": 'Payment for the diaspora can only be in US Dollars. If you have made payment in Naira, kindly send an email to info@possap.gov.ng to get a refund and make payment in the correct currency.',
+        "category": 'payment'
+    },
+    
+    # Application Status (Q20)
+    {
+        "question": 'My application has been pending for over 2 weeks now, what do I do to get it approved?',
+        "answer": 'Kindly reach out to the POSSAP support team via Phone: 02018884040 and/or email: info@possap.gov.ng with your invoice number or file number to get clarification and resolution on the issue.',
+        "category": 'application_status'
+    }
+]
+
+
+def build_faq_documents(faqs: List[Dict]) -> Dict[str, list]:
+    """Build the documents and metadata indexed for retrieval"""
+    documents = []
+    metadatas = []
+    for faq in faqs:
+        # Combine question and answer for better context
+        documents.append(f"Question: {faq['question']}\nAnswer: {faq['answer']}")
+        metadatas.append({
+            "category": faq['category'],
+            "question": faq['question'],
+            "answer": faq['answer']
+        })
+    return {"documents": documents, "metadatas": metadatas}
@@ -0,0 +1,129 @@
+import re
+from typing import NamedTuple, Optional
+
+
+class MessageIntent:
+    """Labels assigned to an incoming chat message before retrieval"""
+    NAME = "name"
+    GREETING = "greeting"
+    THANKS = "thanks"
+    FAQ_QUESTION = "faq_question"
+    OTHER = "other"
+
+
+class MessageClassification(NamedTuple):
+    label: str
+    name: Optional[str] = None
+
+
+class MessageClassifier:
+    """Single-pass classifier run on every /chat message before any retrieval.
+
+    One compiled, case-insensitive alternation tokenizes the message; each match is
+    either an introduction phrase, a thanks/greeting phrase, a question mark
+    or a plain word. Words are then checked against frozensets, so the cost
+    of a message is one regex scan plus O(1) lookups per word.
+    """
+
+    # Common non-names to avoid when capturing the user's name
+    NON_NAMES = frozenset([
+        'hi', 'hello', 'hey', 'good', 'morning', 'afternoon', 'evening',
+        'yes', 'no', 'ok', 'okay', 'sure', 'please', 'help', 'thanks', 'thank',
+        'what', 'how', 'when', 'where', 'why', 'who', 'which',
+        'possap', 'registration', 'license', 'portal', 'login', 'password',
+        'payment', 'certificate', 'support', 'problem', 'issue', 'error',
+        'can', 'will', 'should', 'could', 'would', 'need', 'want', 'like',
+        'get', 'have', 'make', 'take', 'give', 'find', 'know', 'think',
+        'see', 'look', 'check', 'try', 'use', 'work', 'go', 'come',
+        'fine', 'great', 'here', 'there', 'me', 'not', 'unable', 'having',
+        'trying', 'still', 'just', 'done', 'back', 'new', 'the', 'a', 'an'
+    ])
+
+    QUESTION_WORDS = frozenset([
+        'what', 'how', 'when', 'where', 'why', 'who', 'which',
+        'can', 'could', 'should', 'would', 'will', 'is', 'are', 'do', 'does',
+        'did', 'have', 'has', 'may', 'help', 'need', 'want'
+    ])
+
+    # Words that may accompany a greeting or thanks without making it a request,
+    # e.g. "hi there", "thank you so much", "thanks for your help"
+    FILLER_WORDS = frozenset([
+        'there', 'all', 'everyone', 'guys', 'team', 'sir', 'ma', 'madam', 'dear',
+        'so', 'very', 'much', 'a', 'lot', 'for', 'your', 'the', 'help', 'again',
+        'and', 'you', 'ok', 'okay', 'oh', 'well', 'in', 'advance', 'bye'
+    ])
+
+    # Vocabulary drawn from the POSSAP knowledge base categories
+    FAQ_KEYWORDS = frozenset([
+        'possap', 'portal', 'account', 'register', 'registration', 'sign',
+        'signup', 'login', 'password', 'otp', 'verify', 'verification',
+        'verified', 'nin', 'bvn', 'nimc', 'phone', 'email', 'name',
+        'tinted', 'glass', 'permit', 'vvs', 'vin', 'vehicle', 'inspection',
+        'character', 'certificate', 'diaspora', 'biometric', 'biometrics',
+        'facial', 'face', 'photo', 'photograph', 'passport',
+        'payment', 'pay', 'paid', 'debited', 'invoice', 'refund', 'receipt',
+        'naira', 'dollar', 'dollars', 'usd', 'transfer', 'bank',
+        'application', 'apply', 'applied', 'pending', 'status', 'approved',
+        'document', 'documents', 'upload', 'error', 'problem', 'issue'
+    ])
+
+    _PATTERN = re.compile(
+        r"(?P<intro>(?:\bmy name is\s+|(?:^|(?<=[.!,;]))\s*call me\s+|\bname:\s*)(?P<intro_name>[a-z]+)\b)"
+        r"|(?P<soft_intro>^(?:(?:hi|hello|hey)\W+)?(?:i'm|i am|it's|this is)\s+"
+        r"(?P<soft_name>(?-i:[A-Z])[a-z]+)[.!,\s]*$)"
+        r"|(?P<thanks>\b(?:thank you|thank u|thanks|thanx|thx|much appreciated)\b)"
+        r"|(?P<greeting>\b(?:good (?:morning|afternoon|evening)|hello|hey|hi)\b)"
+        r"|(?P<word>[a-z]+(?:'[a-z]+)?)"
+        r"|(?P<qmark>\?)",
+        re.IGNORECASE
+    )
+
+    def classify(self, message: str) -> MessageClassification:
+        """Label a message as name, greeting, thanks, FAQ question or other"""
+        stripped = message.strip()
+        name = None
+        thanks = greeting = question = False
+        words = []
+
+        for match in self._PATTERN.finditer(stripped):
+            kind = match.lastgroup
+            if kind == 'word':
+                words.append(match.group('word').lower())
+            elif kind == 'intro':
+                candidate = match.group('intro_name').lower()
+                if name is None and self._is_valid_name(candidate):
+                    name = candidate
+            elif kind == 'soft_intro':
+                # Only matches when the name is capitalised as typed: "I'm Ade", not "I'm stuck"
+                candidate = match.group('soft_name').lower()
+                if self._is_valid_name(candidate):
+                    name = candidate
+            elif kind == 'thanks':
+                thanks = True
+            elif kind == 'greeting':
+                greeting = True
+            elif kind == 'qmark':
+                question = True
+
+        if name:
+            return MessageClassification(MessageIntent.NAME, name.title())
+
+        # A bare one- or two-word reply must look like a name as typed
+        if (not thanks and not greeting and not question
+                and 1 <= len(words) <= 2
+                and stripped[:1].isupper()
+                and stripped.replace(' ', '').isalpha()
+                and all(self._is_valid_name(word) for word in words)):
+            return MessageClassification(MessageIntent.NAME, ' '.join(words).title())
+
+        # Greetings and thanks get a canned reply, so only label messages that say
+        # nothing else: "thanks, but it still does not work" must reach retrieval
+        if (thanks or greeting) and not question and all(word in self.FILLER_WORDS for word in words):
+            return MessageClassification(MessageIntent.THANKS if thanks else MessageIntent.GREETING)
+        if (question or any(word in self.FAQ_KEYWORDS for word in words)
+                or any(word in self.QUESTION_WORDS for word in words)):
+            return MessageClassification(MessageIntent.FAQ_QUESTION)
+        return MessageClassification(MessageIntent.OTHER)
+
+    def _is_valid_name(self, word: str) -> bool:
+        return len(word) >= 2 and word not in self.NON_NAMES and word not in self.FAQ_KEYWORDS
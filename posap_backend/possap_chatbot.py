@@ -1,22 +1,30 @@
-from flask import Flask, request, jsonify, send_from_directory, session, send_file
+from flask import Flask, request, jsonify, send_from_directory, session, send_file, g
 import os
 from anthropic import Anthropic
 from flask_cors import CORS
 from dotenv import load_dotenv
-import chromadb
-from sentence_transformers import SentenceTransformer
-import numpy as np
 from typing import List, Dict
 import uuid
+import hashlib
 import re
 import time
-from threading import Lock
+import json
+import fcntl
+import inspect
+from threading import Lock, Thread, Timer
+from message_classifier import MessageClassifier, MessageIntent
+from structured_logging import configure_logging, set_request_id, get_request_id, log_duration, get_dropped_count
+from knowledge_base import build_faq_documents
+from embedding_service import EmbeddingClient
+from faq_retrieval import FAQRetriever
 
 # Load environment variables
 load_dotenv()
+logger = configure_logging()
 anthropic_api_key = os.getenv("ANTHROPIC_API_KEY")
-print(f"API Key loaded: {'Yes' if anthropic_api_key else 'No'}")
+logger.info("api_key_loaded", extra={"fields": {"loaded": bool(anthropic_api_key)}})
 client = Anthropic(api_key=anthropic_api_key)
+LLM_MODEL = "claude-sonnet-4-5-20250929"
 app = Flask(__name__)
 # Secret key for Flask sessions
 app.secret_key = os.environ.get(
@@ -25,6 +33,22 @@ app.secret_key = os.environ.get(
 )
 CORS(app)
 
+@app.before_request
+def bind_request_id():
+    """Tag every log line for this request with a shared request ID"""
+    set_request_id(request.headers.get("X-Request-ID", "")[:64] or uuid.uuid4().hex)
+    g.request_start = time.perf_counter()
+
+@app.after_request
+def log_request(response):
+    """Log request completion and echo the request ID back to the client"""
+    response.headers["X-Request-ID"] = get_request_id()
+    log_duration(
+        logger, "request_completed", g.request_start,
+        method=request.method, path=request.path, status=response.status_code
+    )
+    return response
+
 
 # In-memory conversation store
 conversations = {}
@@ -45,7 +69,11 @@ class ConversationManager:
                     'user_name': None,
                     'created_at': time.time(),
                     'last_activity': time.time(),
-                    'messages': []
+                    'messages': [],
+                    # Stable per-message IDs, used as the sync cursor
+                    'next_message_id': 1,
+                    # Bumped on every change; basis of the /get-conversation ETag
+                    'revision': 0
                 }
             else:
                 self.conversations[conversation_id]['last_activity'] = time.time()
@@ -56,6 +84,7 @@ class ConversationManager:
         with self.lock:
             if conversation_id in self.conversations:
                 self.conversations[conversation_id]['user_name'] = name
+                self.conversations[conversation_id]['revision'] += 1
                 self.conversations[conversation_id]['last_activity'] = time.time()
     
     def get_user_name(self, conversation_id: str) -> str:
@@ -68,11 +97,15 @@ class ConversationManager:
         """Add a message to conversation history"""
         with self.lock:
             if conversation_id in self.conversations:
-                self.conversations[conversation_id]['messages'].append({
+                conv = self.conversations[conversation_id]
+                conv['messages'].append({
+                    'id': conv['next_message_id'],
                     'role': role,
                     'content': content,
                     'timestamp': time.time()
                 })
+                conv['next_message_id'] += 1
+                conv['revision'] += 1
                 # Keep only last 10 messages to avoid token limits
                 if len(self.conversations[conversation_id]['messages']) > 10:
                     self.conversations[conversation_id]['messages'] = \
@@ -87,18 +120,27 @@ class ConversationManager:
                 return conv['messages'][-max_messages:]
             return []
     
-    def get_full_conversation(self, conversation_id: str) -> Dict:
-        """Get full conversation data including all messages"""
+    def get_messages_since(self, conversation_id: str, since: int = 0, limit: int = None) -> Dict:
+        """Get messages with an ID greater than since, oldest first, up to limit"""
         with self.lock:
             conv = self.conversations.get(conversation_id)
-            if conv:
-                return {
-                    'user_name': conv.get('user_name'),
-                    'messages': conv.get('messages', []),
-                    'created_at': conv.get('created_at'),
-                    'last_activity': conv.get('last_activity')
-                }
-            return None
+            if not conv:
+                return None
+            messages = conv['messages']
+            newer = [msg for msg in messages if msg['id'] > since]
+            has_more = limit is not None and len(newer) > limit
+            if has_more:
+                newer = newer[:limit]
+            return {
+                'user_name': conv.get('user_name'),
+                'messages': newer,
+                'has_more': has_more,
+                # Older messages than the cursor expects were trimmed from history
+                'history_truncated': bool(messages) and messages[0]['id'] > since + 1,
+                'revision': conv['revision'],
+                'created_at': conv.get('created_at'),
+                'last_activity': conv.get('last_activity')
+            }
     
     def cleanup_old_conversations(self, max_age_hours: int = 24):
         """Clean up conversations older than max_age_hours"""
@@ -115,138 +157,8 @@ class ConversationManager:
 # Initialize the ConversationManager
 conversation_manager = ConversationManager()
 
-# Initialize SentenceTransformer
-embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
-
-# POSSAP Knowledge Base - UPDATED FAQs from Revised Official Document
-possap_faqs = [
-    # Registration and Account Creation (Q1-Q4, Q22-Q23)
-    {
-        "question": 'I tried to use my NIN/BVN to sign up on the POSSAP portal and got an error saying "something went wrong, please contact POSSAP admin"',
-        "answer": 'This means your NIN or BVN record does not have a phone number linked to it. If using NIN, visit the nearest NIMC office to update your record with your current phone number. If using BVN, visit your bank to update your phone number in your BVN details. After updating, contact POSSAP to have your information revalidated in the system.',
-        "category": 'registration'
-    },
-    {
-        "question": 'The name arrangement I see on the POSSAP site is different from what appears on my passport',
-        "answer": 'POSSAP pulls your name directly from NIMC or your bank. Just visit your nearest NIMC office or your bank branch to update how your name appears on your BVN/NIN and contact POSSAP at info@possap.gov.ng for revalidation to proceed with your application.',
-        "category": 'registration'
-    },
-    {
-        "question": 'The phone number or email shown on the POSSAP site is my old one. How can I change it?',
-        "answer": 'POSSAP retrieves information such as your name, phone number etc. directly from the National Identify Management Commission NIMC or Nigeria Inter-bank Settlement System (NIBSS). If your name appears incorrectly, kindly visit the NIMC head office in your state of residence, or the nearest branch of your bank to update the details of your National identification Number (NIN) or your Bank verification Number (BVN) respectively, reach out to POSSAP with your NIN and updated information for revalidation, before continuing your registration.',
-        "category": 'registration'
-    },
-    {
-        "question": "I'm unable to verify my account even after receiving multiple verification codes",
-        "answer": 'Please contact POSSAP Customer Service with your NIN/BVN, phone number and email address via: Phone: 02018884040 and/or email: info@possap.gov.ng',
-        "category": 'registration'
-    },
-    {
-        "question": 'I did not receive the OTP for account verification. What should I do?',
-        "answer": 'Check your spam or junk folder. If not received, confirm your email address is correct and click Resend OTP.',
-        "category": 'registration'
-    },
-    {
-        "question": 'The system says "User already exists" during registration. What should I do?',
-        "answer": 'This means an account is already linked to that identifier or email. Use the Forgot Password option to regain access.',
-        "category": 'registration'
-    },
-    
-    # Tinted Glass Permit Related Issues (Q5-Q7, Q18-Q19, Q24)
-    {
-        "question": "I made payment for VVS and was debited, but it didn't reflect on my invoice",
-        "answer": 'Kindly contact POSSAP Customer Care with your invoice number, Vehicle Identification Number (VIN) and Proof of payment for assistance via the following contact information: Phone: 02018884040 and/or email: info@possap.gov.ng',
-        "category": 'tinted_glass'
-    },
-    {
-        "question": 'What document should I upload to support my Tinted Glass Permit (health-related) application?',
-        "answer": 'You are required to upload a medical report from a government recognized hospital which is duly signed and stamped by the hospital to support your health claim when submitting your application on the POSSAP portal.',
-        "category": 'tinted_glass'
-    },
-    {
-        "question": 'What documents do I need to upload as an applicant for the Tinted Glass Permit opting for the Virtual verification?',
-        "answer": 'Required Documents for uploading include: Proof of ownership of vehicle, Vehicle licensed data page, Supporting document for your reason for application (medical report for health reasons, ID Card for Security reasons, and document proving vehicle is factory fitted with tinted windows for Factory Fitted options).',
-        "category": 'tinted_glass'
-    },
-    {
-        "question": 'How long is a Tinted Glass Permit valid?',
-        "answer": 'The Tinted Glass Permit is valid for one year from the date of issuance and must be renewed after expiration.',
-        "category": 'tinted_glass'
-    },
-    {
-        "question": 'Who is eligible to apply for the Virtual Vehicle Verification System Tinted Glass Permit on the POSSAP platform?',
-        "answer": 'Only owners of vehicles with a valid 17-digit Vehicle Identification Number (VIN) that conforms to international standards are eligible for the Virtual Vehicle Verification System.',
-        "category": 'tinted_glass'
-    },
-    {
-        "question": 'Why am I redirected to another site for Vehicle Verification, what is the Vehicle verification System about?',
-        "answer": "The Vehicle Verification System (VVS) is an external platform integrated with POSSAP. It serves as a Global Vehicle Identification Number (VIN) database that POSSAP utilizes to securely and in real time retrieve comprehensive vehicle information from the global database, thereby ensuring accurate capture of applicants' vehicle details.",
-        "category": 'tinted_glass'
-    },
-    
-    # Police Character Certificate (Q8, Q17)
-    {
-        "question": "I am applying from the diaspora. What proof should I upload to show I'm not in Nigeria?",
-        "answer": 'You can upload any valid supporting document, such as: Official Diaspora Proof of residence document, Utility bills (water or electricity), Bank statement, Lease agreement or other proof of residence abroad, Drivers license, Work permit.',
-        "category": 'character_certificate'
-    },
-    {
-        "question": 'How much does biometric capturing cost for Police Character Certificate & Tinted Glass Permit?',
-        "answer": 'Biometric capturing and physical inspection sessions required for the issuance of Police Character Certificates and Tinted Glass Permits are completely free of charge. Applicants are not required to make any payments for these processes.',
-        "category": 'character_certificate'
-    },
-    
-    # Facial Verification Issues (Q9, Q21)
-    {
-        "question": "The facial verification process isn't capturing my face after several attempts",
-        "answer": 'Try the following: Use a Computer (Desktop/Laptop) instead of a mobile device, Ensure adequate lighting in the room of capture, Use your most recent passport photo for upload. If the issue persists, contact POSSAP Customer Service: Phone: 02018884040 and/or email: info@possap.gov.ng',
-        "category": 'verification'
-    },
-    {
-        "question": 'Why am I unable to complete the virtual verification, and why do I keep getting an error that says, "Face does not match"?',
-        "answer": 'This issue may be due to the use of an outdated passport photograph during your application. Kindly contact the POSSAP Support Team via Phone: 02018884040 or Email: info@possap.gov.ng to request that your uploaded photograph be updated with a more recent one.',
-        "category": 'verification'
-    },
-    
-    # Payment-Related Issues (Q10-Q13, Q16, Q25)
-    {
-        "question": 'Can I make payment for a diaspora application in Naira?',
-        "answer": 'Diaspora payments must be made in dollars (or the corresponding currency of your host country), and for the exact amount displayed on the POSSAP portal.',
-        "category": 'payment'
-    },
-    {
-        "question": 'I erroneously made double payment on the same invoice. How do I get a refund?',
-        "answer": 'Email POSSAP Customer Service at info@possap.gov.ng or call 02018884040, providing the following: Receipt of both payments, Date of payment, Invoice number, Account number paid into, Your Bank details (Account name & Number), Your email address and phone number. Refund processing will follow once verification processes have been concluded.',
-        "category": 'payment'
-    },
-    {
-        "question": 'I made payment on the wrong invoice number. Can I transfer the payment to the correct one?',
-        "answer": 'Payments cannot be transferred between invoices. You may either use the service linked to the paid invoice or make a new payment under the correct invoice.',
-        "category": 'payment'
-    },
-    {
-        "question": 'Can I transfer a payment made under the wrong invoice?',
-        "answer": 'No. Kindly note that Payments are linked to specific invoices and cannot be transferred. You will be required to initiate a new payment for the appropriate service.',
-        "category": 'payment'
-    },
-    {
-        "question": "I made payment on my generated invoice, but it didn't reflect",
-        "answer": "Contact POSSAP Customer Service with your payment receipt and invoice number: Phone: 02018884040 and/or email: info@possap.gov.ng. If payment hasn't reflected on POSSAP's end, you will be advised to contact your bank to lodge a complaint.",
-        "category": 'payment'
-    },
-    {
-        "question": 'Why is my payment not reflected after I mistakenly paid in naira instead of 53.76 USD?',
-        "answer": 'Payment for the diaspora can only be in US Dollars. If you have made payment in Naira, kindly send an email to info@possap.gov.ng to get a refund and make payment in the correct currency.',
-        "category": 'payment'
-    },
-    
-    # Application Status (Q20)
-    {
-        "question": 'My application has been pending for over 2 weeks now, what do I do to get it approved?',
-        "answer": 'Kindly reach out to the POSSAP support team via Phone: 02018884040 and/or email: info@possap.gov.ng with your invoice number or file number to get clarification and resolution on the issue.',
-        "category": 'application_status'
-    }
-]
+# Optional shared embedding sidecar (see embedding_service.py)
+EMBEDDING_SERVICE_SOCKET = os.getenv("EMBEDDING_SERVICE_SOCKET")
 
 class HyperlinkProcessor:
     """Class to handle hyperlink processing for POSSAP responses"""
@@ -309,79 +221,12 @@ class HyperlinkProcessor:
         """Process FAQ answer to include hyperlinks"""
         return HyperlinkProcessor.convert_to_hyperlinks(answer)
 
-class POSSAPRAGSystem:
+class POSSAPRAGSystem(FAQRetriever):
     def __init__(self):
-        self.collection_name = "possap_faqs"
-        # Initialize ChromaDB client as instance attribute
-        self.chroma_client = chromadb.Client()
         self.hyperlink_processor = HyperlinkProcessor()
-        self.setup_vector_database()
-    
-    def setup_vector_database(self):
-        """Initialize ChromaDB collection with POSSAP FAQs"""
-        try:
-            # Delete existing collection if it exists
-            try:
-                self.chroma_client.delete_collection(name=self.collection_name)
-            except:
-                pass
-            
-            # Create new collection
-            self.collection = self.chroma_client.create_collection(
-                name=self.collection_name,
-                metadata={"hnsw:space": "cosine"}
-            )
-            
-            # Prepare documents for embedding
-            documents = []
-            metadatas = []
-            ids = []
-            
-            for i, faq in enumerate(possap_faqs):
-                # Combine question and answer for better context
-                doc_text = f"Question: {faq['question']}\nAnswer: {faq['answer']}"
-                documents.append(doc_text)
-                metadatas.append({
-                    "category": faq['category'],
-                    "question": faq['question'],
-                    "answer": faq['answer']
-                })
-                ids.append(str(uuid.uuid4()))
-            
-            # Add documents to collection
-            self.collection.add(
-                documents=documents,
-                metadatas=metadatas,
-                ids=ids
-            )
-            
-            print(f"✅ Vector database initialized with {len(possap_faqs)} FAQs")
-            
-        except Exception as e:
-            print(f"❌ Error setting up vector database: {e}")
-    
-    def retrieve_relevant_faqs(self, query: str, n_results: int = 3) -> List[Dict]:
-        """Retrieve most relevant FAQs based on user query"""
-        try:
-            results = self.collection.query(
-                query_texts=[query],
-                n_results=n_results
-            )
-            
-            relevant_faqs = []
-            if results['metadatas'] and len(results['metadatas'][0]) > 0:
-                for metadata in results['metadatas'][0]:
-                    relevant_faqs.append({
-                        "question": metadata['question'],
-                        "answer": metadata['answer'],
-                        "category": metadata['category']
-                    })
-            
-            return relevant_faqs
-            
-        except Exception as e:
-            print(f"❌ Error retrieving FAQs: {e}")
-            return []
+        super().__init__(
+            embedding_client=EmbeddingClient(EMBEDDING_SERVICE_SOCKET) if EMBEDDING_SERVICE_SOCKET else None
+        )
     
     def generate_rag_response(self, user_query: str, user_name: str = None, conversation_history: List[Dict] = None) -> Dict:
         """Generate response using RAG with conversation context"""
@@ -461,14 +306,20 @@ CONTACT INFO (use when relevant):
             messages.append({"role": "user", "content": current_prompt})
             
             # Step 6: Generate response using Claude
+            start = time.perf_counter()
             response = client.messages.create(
-                model="claude-sonnet-4-5-20250929",
+                model=LLM_MODEL,
                 max_tokens=300,
                 temperature=0.7,
                 system=system_prompt,
                 messages=messages
             )
             
+            log_duration(
+                logger, "llm_call_completed", start,
+                input_tokens=response.usage.input_tokens,
+                output_tokens=response.usage.output_tokens
+            )
             raw_response = response.content[0].text
             
             # Step 7: Process response to add hyperlinks
@@ -482,8 +333,8 @@ CONTACT INFO (use when relevant):
                 "context_used": bool(context)
             }
             
-        except Exception as e:
-            print(f"❌ Error generating RAG response: {e}")
+        except Exception:
+            logger.exception("rag_response_failed")
             error_message = "Oops! I'm having a moment here. Can you try again, or reach out to support@possap.gov.ng?"
             return {
                 "response": error_message,
@@ -498,55 +349,194 @@ rag_system = POSSAPRAGSystem()
 # Initialize conversation manager
 conversation_manager = ConversationManager()
 
-def extract_name_from_message(message: str) -> str:
-    """Extract name from user message"""
-    message_lower = message.lower().strip()
-    
-    # Common patterns for name introduction - ONLY explicit name patterns
-    name_patterns = [
-        r"my name is\s+(\w+)",
-        r"i'm\s+(\w+)",
-        r"i am\s+(\w+)",
-        r"call me\s+(\w+)",
-        r"it's\s+(\w+)",
-        r"this is\s+(\w+)",
-        r"name:\s*(\w+)",
-        r"^([a-zA-Z]{2,}(?:\s+[a-zA-Z]{2,})?)$"  # One or two words with at least 2 letters each
-    ]
-    
-    # Expanded list of common non-names to avoid
-    non_names = [
-        'hi', 'hello', 'hey', 'good', 'morning', 'afternoon', 'evening',
-        'yes', 'no', 'ok', 'okay', 'sure', 'please', 'help', 'thanks', 'thank',
-        'what', 'how', 'when', 'where', 'why', 'who', 'which',
-        'possap', 'registration', 'license', 'portal', 'login', 'password',
-        'payment', 'certificate', 'support', 'problem', 'issue', 'error',
-        'can', 'will', 'should', 'could', 'would', 'need', 'want', 'like',
-        'get', 'have', 'make', 'take', 'give', 'find', 'know', 'think',
-        'see', 'look', 'check', 'try', 'use', 'work', 'go', 'come'
-    ]
-    
-    for pattern in name_patterns:
-        match = re.search(pattern, message_lower)
-        if match:
-            potential_name = match.group(1).strip()
+# Prompts sent by the frontend quick-action buttons; answered ahead of time
+QUICK_ACTION_PROMPTS = [
+    "How do I apply for a Police Character Certificate?",
+    "How long is a Tinted Glass Permit valid?",
+    "I made a payment but it didn't reflect",
+    "I didn't receive my OTP",
+    "How do I contact POSSAP support?"
+]
+
+class QuickActionCache:
+    """Pre-rendered answers for the fixed quick-action prompts.
+    
+    Answers are generated in the background at startup and again whenever
+    the knowledge base reloads. Only one process per node generates them:
+    it holds an flock while warming and publishes the answers to a shared
+    JSON file, which the other workers pick up on demand. Only complete sets
+    are published or adopted; prompts whose generation failed are retried
+    later. Until a prompt is warm, /chat falls through to the normal RAG path.
+    """
+    
+    # Seconds between checks for answers published by another worker,
+    # doubling after each miss up to the maximum
+    SHARED_POLL_INTERVAL = 1.0
+    SHARED_POLL_MAX_INTERVAL = 60.0
+    # Seconds before retrying prompts that could not be generated
+    WARM_RETRY_INTERVAL = 60.0
+    
+    def __init__(self, rag: POSSAPRAGSystem, prompts: List[str], cache_path: str):
+        self.rag = rag
+        self.prompts = list(prompts)
+        self.cache_path = cache_path
+        self.answers = {}
+        self.fingerprint = None
+        self.last_shared_check = 0.0
+        self.shared_poll_interval = self.SHARED_POLL_INTERVAL
+        self.lock = Lock()
+        # flock is per open file, so warms in this process must also take turns
+        self.warm_lock = Lock()
+        self.rag.add_reload_listener(self.refresh_in_background)
+    
+    @staticmethod
+    def normalize(prompt: str) -> str:
+        return " ".join(prompt.lower().split())
+    
+    def compute_fingerprint(self) -> str:
+        """Identify the answers by the knowledge base, prompts and code they were built from"""
+        # The system prompt and hyperlink rendering live in code, so their source
+        # stands in for a version: a deploy that changes them invalidates the file
+        code = [
+            LLM_MODEL,
+            inspect.getsource(type(self.rag).generate_rag_response),
+            inspect.getsource(type(self.rag.hyperlink_processor))
+        ]
+        digest = hashlib.sha256()
+        for text in build_faq_documents(self.rag.faqs)["documents"] + self.prompts + code:
+            digest.update(b"\0" + text.encode())
+        return digest.hexdigest()
+    
+    def is_complete(self, answers: Dict) -> bool:
+        return all(self.normalize(prompt) in answers for prompt in self.prompts)
+    
+    def load_shared(self, fingerprint: str) -> bool:
+        """Adopt a complete answer set published by another worker if it matches fingerprint"""
+        try:
+            with open(self.cache_path) as cache_file:
+                shared = json.load(cache_file)
+        except (OSError, ValueError):
+            return False
+        if shared.get("fingerprint") != fingerprint or not self.is_complete(shared.get("answers", {})):
+            return False
+        with self.lock:
+            if self.fingerprint == fingerprint:
+                self.answers = shared["answers"]
+        return True
+    
+    def publish_shared(self, fingerprint: str, answers: Dict):
+        """Atomically write answers for the other workers on this node"""
+        tmp_path = f"{self.cache_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as cache_file:
+            json.dump({"fingerprint": fingerprint, "answers": answers}, cache_file)
+        os.replace(tmp_path, self.cache_path)
+    
+    def warm(self):
+        """Generate, or adopt from another worker, answers for every prompt"""
+        # Runs off the request path, so tag its log lines with their own ID
+        set_request_id(f"warm-{uuid.uuid4().hex}")
+        kb_version = self.rag.kb_version
+        fingerprint = self.compute_fingerprint()
+        with self.lock:
+            if self.fingerprint != fingerprint:
+                self.fingerprint = fingerprint
+                self.answers = {}
+            # A retry keeps the answers that already succeeded
+            answers = dict(self.answers)
+        if self.load_shared(fingerprint):
+            return
+        
+        with self.warm_lock, open(f"{self.cache_path}.lock", "w") as lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                # Another worker is warming; get() picks up its answers, and the
+                # retry covers that worker failing or exiting part way through
+                logger.info("quick_actions_warming_in_other_worker")
+                self.schedule_retry(fingerprint)
+                return
             
-            # For single word pattern, be more strict
-            if pattern == r"^(\w+)$":
-                # Must be at least 2 characters, start with capital when original, and not in non-names
-                original_word = message.strip()
-                if (len(potential_name) >= 2 and 
-                    potential_name.lower() not in non_names and 
-                    original_word[0].isupper() and  # Original message starts with capital
-                    original_word.isalpha()):  # Contains only letters
-                    return potential_name.title()
-            else:
-                # For explicit patterns like "my name is", be less strict
-                if (len(potential_name) >= 2 and 
-                    potential_name.lower() not in non_names):
-                    return potential_name.title()
+            # The lock holder may have finished just before we took the lock
+            if self.load_shared(fingerprint):
+                return
+            
+            for prompt in self.prompts:
+                if self.normalize(prompt) in answers:
+                    continue
+                response_data = self.rag.generate_rag_response(prompt)
+                # Don't pin the fallback error message as a cached answer
+                if not response_data["context_used"]:
+                    continue
+                answers[self.normalize(prompt)] = response_data
+            
+            # A newer reload may have started while this one was generating
+            if kb_version != self.rag.kb_version:
+                return
+            complete = self.is_complete(answers)
+            # A partial set would stop every worker from retrying the missing prompts
+            if complete:
+                self.publish_shared(fingerprint, answers)
+        
+        with self.lock:
+            if self.fingerprint == fingerprint:
+                self.answers = answers
+        logger.info("quick_actions_warmed", extra={"fields": {"warm": len(answers), "total": len(self.prompts)}})
+        if not complete:
+            self.schedule_retry(fingerprint)
+    
+    def schedule_retry(self, fingerprint: str):
+        """Warm again later unless a reload has replaced this answer set"""
+        def retry():
+            with self.lock:
+                current = self.fingerprint == fingerprint and not self.is_complete(self.answers)
+            if current:
+                self.warm()
+        
+        timer = Timer(self.WARM_RETRY_INTERVAL, retry)
+        timer.daemon = True
+        timer.start()
+    
+    def refresh_in_background(self):
+        """Re-warm answers without blocking the caller"""
+        with self.lock:
+            self.answers = {}
+            self.fingerprint = None
+            self.shared_poll_interval = self.SHARED_POLL_INTERVAL
+        Thread(target=self.warm, daemon=True).start()
     
-    return None
+    def get(self, prompt: str) -> Dict:
+        """Return the pre-rendered answer for a quick-action prompt, if warm"""
+        with self.lock:
+            answers = self.answers
+            fingerprint = self.fingerprint
+            check_shared = (
+                not self.is_complete(answers) and fingerprint is not None
+                and time.monotonic() - self.last_shared_check >= self.shared_poll_interval
+            )
+            if check_shared:
+                self.last_shared_check = time.monotonic()
+        if check_shared:
+            adopted = self.load_shared(fingerprint)
+            with self.lock:
+                if adopted:
+                    answers = self.answers
+                else:
+                    # Back off so a warm that never completes isn't re-read every second
+                    self.shared_poll_interval = min(self.shared_poll_interval * 2, self.SHARED_POLL_MAX_INTERVAL)
+        return answers.get(self.normalize(prompt))
+
+# Initialize quick-action cache; one worker per node warms it in the background
+QUICK_ACTION_CACHE_PATH = os.getenv("QUICK_ACTION_CACHE_PATH", "/tmp/possap-quick-actions.json")
+quick_action_cache = QuickActionCache(rag_system, QUICK_ACTION_PROMPTS, QUICK_ACTION_CACHE_PATH)
+quick_action_cache.refresh_in_background()
+
+# Reload the knowledge base when knowledge_base.py changes (0 disables)
+KB_RELOAD_INTERVAL_SECONDS = float(os.getenv("KB_RELOAD_INTERVAL_SECONDS", "30"))
+if KB_RELOAD_INTERVAL_SECONDS > 0:
+    rag_system.watch_knowledge_base(KB_RELOAD_INTERVAL_SECONDS)
+
+# Initialize pre-LLM message classifier
+message_classifier = MessageClassifier()
 
 @app.route("/chat", methods=["POST"])
 def chat():
@@ -556,7 +546,7 @@ def chat():
     # Generate unique conversation_id if not provided
     if not conversation_id or conversation_id == "default":
         conversation_id = str(uuid.uuid4())
-        print(f"🆕 Generated new conversation_id: {conversation_id}")
+        logger.info("conversation_created", extra={"fields": {"conversation_id": conversation_id}})
     
     if not user_input:
         return jsonify({"error": "No message received"}), 400
@@ -566,12 +556,14 @@ def chat():
         conversation = conversation_manager.get_or_create_conversation(conversation_id)
         user_name = conversation.get('user_name')
         
+        # Classify the message once; everything below routes on its label
+        classification = message_classifier.classify(user_input)
+        
         # If no name in conversation, first check if this is a name response
         if not user_name:
-            extracted_name = extract_name_from_message(user_input)
-            if extracted_name:
-                conversation_manager.set_user_name(conversation_id, extracted_name)
-                user_name = extracted_name
+            if classification.label == MessageIntent.NAME:
+                user_name = classification.name
+                conversation_manager.set_user_name(conversation_id, user_name)
                 # Acknowledge the name and ask how to help
                 response = f"Hello {user_name}! Nice to meet you 😊 How can I help you with POSSAP today?"
                 processed_response = rag_system.hyperlink_processor.convert_to_hyperlinks(response)
@@ -585,47 +577,62 @@ def chat():
                     "relevant_faqs": [],
                     "context_used": False,
                     "name_captured": True,
+                    "intent": classification.label,
                     "conversation_id": conversation_id
                 })
             else:
                 # Ask for name if not provided and not in conversation
                 # Don't treat greetings as requests for help
-                greeting_words = ['hi', 'hello', 'hey', 'good morning', 'good afternoon', 'good evening']
-                if any(greeting in user_input.lower() for greeting in greeting_words):
+                if classification.label == MessageIntent.GREETING:
                     response = "Hello! May I know your name?"
-                    conversation_manager.add_message(conversation_id, "assistant", response)
-                    return jsonify({
-                        "reply": response,
-                        "raw_reply": response,
-                        "relevant_faqs": [],
-                        "context_used": False,
-                        "asking_for_name": True,
-                        "conversation_id": conversation_id
-                    })
                 else:
                     response = "May I know your name?"
-                    conversation_manager.add_message(conversation_id, "assistant", response)
-                    return jsonify({
-                        "reply": response,
-                        "raw_reply": response,
-                        "relevant_faqs": [],
-                        "context_used": False,
-                        "asking_for_name": True,
-                        "conversation_id": conversation_id
-                    })
+                conversation_manager.add_message(conversation_id, "assistant", response)
+                return jsonify({
+                    "reply": response,
+                    "raw_reply": response,
+                    "relevant_faqs": [],
+                    "context_used": False,
+                    "asking_for_name": True,
+                    "intent": classification.label,
+                    "conversation_id": conversation_id
+                })
         
         # Store user message in history
         conversation_manager.add_message(conversation_id, "user", user_input)
         
+        # Greetings and thanks get a brief canned reply without retrieval or an LLM call
+        if classification.label in (MessageIntent.GREETING, MessageIntent.THANKS):
+            if classification.label == MessageIntent.GREETING:
+                response = f"Hi {user_name}! How can I help you with POSSAP today?"
+            else:
+                response = "You're welcome! Happy to help 😊"
+            conversation_manager.add_message(conversation_id, "assistant", response)
+            return jsonify({
+                "reply": response,
+                "raw_reply": response,
+                "relevant_faqs": [],
+                "context_used": False,
+                "user_name": user_name,
+                "intent": classification.label,
+                "conversation_id": conversation_id
+            })
+        
         # Get conversation history
         conversation_history = conversation_manager.get_conversation_history(conversation_id)
         
-        # Generate response using RAG with user name and conversation history
-        response_data = rag_system.generate_rag_response(
-            user_input, 
-            user_name,
-            conversation_history
-        )
+        # Quick-action prompts on a fresh turn are answered from the warm cache
+        is_fresh_turn = sum(1 for msg in conversation_history if msg['role'] == "user") == 1
+        response_data = quick_action_cache.get(user_input) if is_fresh_turn else None
+        quick_action = response_data is not None
+        
+        # Otherwise generate response using RAG with user name and conversation history
+        if response_data is None:
+            response_data = rag_system.generate_rag_response(
+                user_input, 
+                user_name,
+                conversation_history
+            )
         
         # Store bot response in history
         conversation_manager.add_message(conversation_id, "assistant", response_data["response"])
@@ -636,53 +643,98 @@ def chat():
             "relevant_faqs": response_data["relevant_faqs"],
             "context_used": response_data["context_used"],
             "user_name": user_name,
+            "intent": classification.label,
+            "quick_action": quick_action,
             "conversation_id": conversation_id
         })
     
-    except Exception as e:
-        print(f"❌ Error in chat endpoint: {e}")
+    except Exception:
+        logger.exception("chat_endpoint_failed")
         return jsonify({"error": "Internal server error"}), 500
 
+def parse_non_negative_int(value):
+    """Parse an optional query/JSON integer, rejecting bools, floats and signs"""
+    if value is None or value == "":
+        return None
+    if isinstance(value, int) and not isinstance(value, bool) and value >= 0:
+        return value
+    if isinstance(value, str) and value.isascii() and value.isdigit():
+        return int(value)
+    raise ValueError(f"Not a non-negative integer: {value!r}")
+
 # NEW ENDPOINT: Get conversation history for persistence
-@app.route("/get-conversation", methods=["POST"])
+@app.route("/get-conversation", methods=["GET", "POST"])
 def get_conversation():
-    """Get full conversation history for a given conversation_id"""
-    conversation_id = request.json.get("conversation_id")
+    """Get conversation history for a given conversation_id.
+    
+    Pass `since` (a message ID cursor) to receive only newer messages and
+    `limit` to page through them. Responses carry an ETag; a matching
+    If-None-Match gets 304 Not Modified.
+    """
+    params = request.args if request.method == "GET" else (request.get_json(silent=True) or {})
+    if not isinstance(params, dict):
+        return jsonify({"error": "Request body must be a JSON object"}), 400
+    conversation_id = params.get("conversation_id")
     
     if not conversation_id:
         return jsonify({"error": "No conversation_id provided"}), 400
     
     try:
-        conversation_data = conversation_manager.get_full_conversation(conversation_id)
+        since = parse_non_negative_int(params.get("since"))
+        limit = parse_non_negative_int(params.get("limit"))
+    except ValueError:
+        return jsonify({"error": "since and limit must be non-negative integers"}), 400
+    
+    since = since or 0
+    if limit is not None and limit < 1:
+        return jsonify({"error": "limit must be >= 1"}), 400
+    
+    try:
+        conversation_data = conversation_manager.get_messages_since(conversation_id, since, limit)
         
         if conversation_data:
-            # Process messages to add hyperlinks
+            etag = hashlib.sha1(
+                f"{conversation_id}:{conversation_data['revision']}:{since}:{limit}".encode()
+            ).hexdigest()
+            if request.if_none_match.contains_weak(etag):
+                not_modified = app.response_class(status=304)
+                not_modified.set_etag(etag)
+                return not_modified
+            
+            # Process only the returned messages to add hyperlinks
             processed_messages = []
-            for msg in conversation_data.get('messages', []):
+            for msg in conversation_data['messages']:
                 processed_content = rag_system.hyperlink_processor.convert_to_hyperlinks(msg['content'])
                 processed_messages.append({
+                    'id': msg['id'],
                     'role': msg['role'],
                     'content': processed_content,
                     'raw_content': msg['content'],
                     'timestamp': msg.get('timestamp')
                 })
             
-            return jsonify({
+            response = jsonify({
                 "success": True,
                 "conversation_id": conversation_id,
                 "user_name": conversation_data.get('user_name'),
                 "messages": processed_messages,
+                "next_cursor": processed_messages[-1]['id'] if processed_messages else since,
+                "has_more": conversation_data['has_more'],
+                "history_truncated": conversation_data['history_truncated'],
                 "created_at": conversation_data.get('created_at'),
                 "last_activity": conversation_data.get('last_activity')
             })
+            response.set_etag(etag)
+            response.headers["Cache-Control"] = "no-cache"
+            return response
         else:
             return jsonify({
                 "success": False,
                 "message": "Conversation not found"
             }), 404
     
-    except Exception as e:
-        print(f"❌ Error in get-conversation endpoint: {e}")
+    except Exception:
+        logger.exception("get_conversation_endpoint_failed")
         return jsonify({"error": "Internal server error"}), 500
 
 @app.route("/reset-session", methods=["POST"])
@@ -710,10 +762,20 @@ def search_faqs():
         relevant_faqs = rag_system.retrieve_relevant_faqs(query, n_results=5)
         return jsonify({"faqs": relevant_faqs})
     
-    except Exception as e:
-        print(f"❌ Error in search endpoint: {e}")
+    except Exception:
+        logger.exception("search_endpoint_failed")
         return jsonify({"error": "Internal server error"}), 500
 
+@app.route("/quick-actions", methods=["GET"])
+def get_quick_actions():
+    """List the server-configured quick-action prompts for the frontend"""
+    return jsonify({
+        "quick_actions": [
+            {"prompt": prompt, "warm": quick_action_cache.get(prompt) is not None}
+            for prompt in quick_action_cache.prompts
+        ]
+    })
+
 @app.route("/health", methods=["GET"])
 def health_check():
     """Health check endpoint"""
@@ -721,11 +783,13 @@ def health_check():
         "status": "healthy",
         "rag_system": "operational",
         "model": "claude-sonnet-4-5",
-        "total_faqs": len(possap_faqs),
+        "total_faqs": len(rag_system.faqs),
+        "retrieval_backend": rag_system.retrieval_backend,
         "hyperlink_processing": "enabled",
         "session_support": "enabled",
         "conversation_memory": "enabled",
-        "conversation_persistence": "enabled"
+        "conversation_persistence": "enabled",
+        "dropped_log_records": get_dropped_count()
     })
 
 @app.route("/process-text", methods=["POST"])
@@ -742,8 +806,8 @@ def process_text():
             "processed_text": processed_text
         })
     
-    except Exception as e:
-        print(f"❌ Error in process-text endpoint: {e}")
+    except Exception:
+        logger.exception("process_text_endpoint_failed")
         return jsonify({"error": "Internal server error"}), 500
 
 
@@ -754,7 +818,7 @@ def serve_frontend():
     try:
         return send_file('frontend/index2.html')
     except Exception as e:
-        print(f"Error serving frontend: {e}")
+        logger.exception("serve_frontend_failed")
         return f"Frontend error: {e}", 500
 
 @app.route('/static/<path:filename>')
@@ -767,9 +831,12 @@ def serve_static(filename):
 
 if __name__ == "__main__":
     port = int(os.environ.get('PORT', 8080))
-    print(f"🚀 Starting POSSAP Chatbot with Claude Sonnet 4.5 on port {port}")
-    print(f"📁 Working directory: {os.getcwd()}")
-    print(f"📄 Frontend exists: {os.path.exists('frontend/index2.html')}")
+    logger.info("server_starting", extra={"fields": {
+        "model": "claude-sonnet-4-5",
+        "port": port,
+        "cwd": os.getcwd(),
+        "frontend_exists": os.path.exists('frontend/index2.html')
+    }})
     
     app.run(
         host='0.0.0.0',  # MUST be 0.0.0.0 for Cloud Run
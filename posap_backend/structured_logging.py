@@ -0,0 +1,196 @@
+import atexit
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import threading
+import time
+import zlib
+from typing import Optional
+
+LOGGER_NAME = "possap"
+
+# Request ID of the request being handled by the current thread/context
+_request_id = contextvars.ContextVar("request_id", default=None)
+
+_listener = None
+_queue_handler = None
+
+
+def set_request_id(request_id: Optional[str]):
+    """Bind a request ID to the current context"""
+    _request_id.set(request_id)
+
+
+def get_request_id() -> Optional[str]:
+    """Get the request ID bound to the current context"""
+    return _request_id.get()
+
+
+class RequestContextFilter(logging.Filter):
+    """Stamp each record with the request ID and decide whether to sample it.
+
+    Records at WARNING and above are always kept. Lower levels are sampled
+    per request ID, so all lines from one request are either kept or dropped
+    together.
+    """
+
+    def __init__(self, sample_rate: float = 1.0):
+        super().__init__()
+        self.sample_rate = sample_rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = _request_id.get()
+        if record.levelno >= logging.WARNING or self.sample_rate >= 1.0:
+            return True
+        if record.request_id is None:
+            return random.random() < self.sample_rate
+        bucket = zlib.crc32(record.request_id.encode()) % 10000
+        return bucket < self.sample_rate * 10000
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """Queue handler that drops records instead of blocking when the queue is full.
+
+    Drops are counted and reported as a WARNING record at most once per
+    report_interval seconds, once the queue has room again.
+    """
+
+    def __init__(self, log_queue: queue.Queue, report_interval: float = 10.0):
+        super().__init__(log_queue)
+        self.report_interval = report_interval
+        self.dropped = 0
+        self.reported = 0
+        self.last_report = 0.0
+        self.drop_lock = threading.Lock()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Only resolve the message here; JSON encoding happens on the listener thread
+        record = logging.makeLogRecord(record.__dict__)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self.drop_lock:
+                self.dropped += 1
+            return
+        if self.dropped != self.reported:
+            self._report_drops()
+
+    def _report_drops(self):
+        with self.drop_lock:
+            now = time.monotonic()
+            if now - self.last_report < self.report_interval:
+                return
+            newly_dropped = self.dropped - self.reported
+            self.reported = self.dropped
+            self.last_report = now
+
+        warning = logging.makeLogRecord({
+            "name": LOGGER_NAME,
+            "levelno": logging.WARNING,
+            "levelname": "WARNING",
+            "msg": "log_records_dropped",
+            "request_id": None,
+            "fields": {"dropped": newly_dropped, "dropped_total": self.reported}
+        })
+        try:
+            self.queue.put_nowait(warning)
+        except queue.Full:
+            with self.drop_lock:
+                self.reported -= newly_dropped
+
+
+class DrainingQueueListener(logging.handlers.QueueListener):
+    """Queue listener whose shutdown waits for room instead of raising queue.Full"""
+
+    sentinel_timeout = 5.0
+
+    def enqueue_sentinel(self):
+        self.queue.put(self._sentinel, timeout=self.sentinel_timeout)
+
+    def stop(self):
+        try:
+            self.enqueue_sentinel()
+        except queue.Full:
+            # The writer is stuck; its daemon thread ends with the process
+            return
+        self._thread.join()
+        self._thread = None
+
+
+class JSONFormatter(logging.Formatter):
+    """Render a record as a single-line JSON object"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": round(record.created, 6),
+            "level": record.levelname,
+            "logger": record.name,
+            "event": record.getMessage(),
+            "request_id": getattr(record, "request_id", None),
+        }
+        entry.update(getattr(record, "fields", None) or {})
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+def configure_logging(level: str = None, sample_rate: float = None,
+                      queue_size: int = None) -> logging.Logger:
+    """Route the app logger through a bounded queue to a background writer.
+
+    Request handlers only enqueue records; a QueueListener thread formats them
+    as JSON and writes to stdout. Settings default to the LOG_LEVEL,
+    LOG_SAMPLE_RATE and LOG_QUEUE_SIZE environment variables.
+    """
+    global _listener, _queue_handler
+
+    level = level or os.getenv("LOG_LEVEL", "INFO")
+    if sample_rate is None:
+        sample_rate = float(os.getenv("LOG_SAMPLE_RATE", "1.0"))
+    if queue_size is None:
+        queue_size = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+
+    logger = logging.getLogger(LOGGER_NAME)
+    if _listener is not None:
+        return logger
+
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(JSONFormatter())
+
+    log_queue = queue.Queue(maxsize=queue_size)
+    queue_handler = NonBlockingQueueHandler(log_queue)
+    queue_handler.addFilter(RequestContextFilter(sample_rate))
+
+    logger.setLevel(level.upper())
+    logger.addHandler(queue_handler)
+    logger.propagate = False
+
+    _queue_handler = queue_handler
+    _listener = DrainingQueueListener(log_queue, stream_handler)
+    _listener.start()
+    atexit.register(_listener.stop)
+    return logger
+
+
+def get_dropped_count() -> int:
+    """Total log records dropped because the queue was full"""
+    return _queue_handler.dropped if _queue_handler is not None else 0
+
+
+def log_duration(logger: logging.Logger, event: str, start: float, **fields):
+    """Log an event with the milliseconds elapsed since start"""
+    fields["duration_ms"] = round((time.perf_counter() - start) * 1000, 2)
+    logger.info(event, extra={"fields": fields})